@@ -2,38 +2,57 @@ from azure.ai.projects import AIProjectClient
 from azure.ai.projects.models import ConnectionType
 from azure.identity import DefaultAzureCredential
 from azure.core.credentials import AzureKeyCredential
-from azure.search.documents import SearchClient
+from azure.search.documents import SearchIndexingBufferedSender
 from azure.search.documents.indexes import SearchIndexClient
 from config import get_logger
+from embedding_cache import cached_embed_batch
 from creole import creole2html
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_text_splitters import HTMLHeaderTextSplitter
 
 import os
+import time
 import fitz  # PyMuPDF
 import hashlib
+import functools
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from azure.core.exceptions import HttpResponseError
 
 # initialize logging object
 logger = get_logger(__name__)
 
+# The Azure clients are created lazily so importing this module doesn't pay
+# credential discovery and network round-trips; each accessor caches its
+# client for the life of the process.
+
 # create a project client using environment variables loaded from the .env file
-project = AIProjectClient.from_connection_string(
-    conn_str=os.environ["AIPROJECT_CONNECTION_STRING"], credential=DefaultAzureCredential()
-)
+@functools.cache
+def get_project():
+    return AIProjectClient.from_connection_string(
+        conn_str=os.environ["AIPROJECT_CONNECTION_STRING"], credential=DefaultAzureCredential()
+    )
 
 # create a vector embeddings client that will be used to generate vector embeddings
-embeddings = project.inference.get_embeddings_client()
+@functools.cache
+def get_embeddings():
+    return get_project().inference.get_embeddings_client()
 
 # use the project client to get the default search connection
-search_connection = project.connections.get_default(
-    connection_type=ConnectionType.AZURE_AI_SEARCH, include_credentials=True
-)
+@functools.cache
+def get_search_connection():
+    return get_project().connections.get_default(
+        connection_type=ConnectionType.AZURE_AI_SEARCH, include_credentials=True
+    )
 
 # Create a search index client using the search connection
 # This client will be used to create and delete search indexes
-index_client = SearchIndexClient(
-    endpoint=search_connection.endpoint_url, credential=AzureKeyCredential(key=search_connection.key)
-)
+@functools.cache
+def get_index_client():
+    search_connection = get_search_connection()
+    return SearchIndexClient(
+        endpoint=search_connection.endpoint_url, credential=AzureKeyCredential(key=search_connection.key)
+    )
 
 import pandas as pd
 from azure.search.documents.indexes.models import (
@@ -52,6 +71,7 @@ from azure.search.documents.indexes.models import (
     VectorSearchAlgorithmMetric,
     ExhaustiveKnnAlgorithmConfiguration,
     ExhaustiveKnnParameters,
+    ScalarQuantizationCompression,
     VectorSearchProfile,
     SearchIndex,
 )
@@ -93,6 +113,16 @@ def create_index_definition(index_name: str, model: str) -> SearchIndex:
     # For vector search, we want to use the HNSW (Hierarchical Navigable Small World)
     # algorithm (a type of approximate nearest neighbor search algorithm) with cosine
     # distance.
+    # Quantize the stored vectors to int8 — 1536/3072-dim float32 vectors are
+    # 6/12 KB per document, and scalar quantization cuts index storage to a
+    # quarter with negligible recall impact; rescoring with oversampling on
+    # the original vectors keeps accuracy.
+    compression = ScalarQuantizationCompression(
+        compression_name="myScalarQuantization",
+        rerank_with_original_vectors=True,
+        default_oversampling=4,
+    )
+
     vector_search = VectorSearch(
         algorithms=[
             HnswAlgorithmConfiguration(
@@ -111,10 +141,13 @@ def create_index_definition(index_name: str, model: str) -> SearchIndex:
                 parameters=ExhaustiveKnnParameters(metric=VectorSearchAlgorithmMetric.COSINE),
             ),
         ],
+        # compression is only supported on the HNSW profile
+        compressions=[compression],
         profiles=[
             VectorSearchProfile(
                 name="myHnswProfile",
                 algorithm_configuration_name="myHnsw",
+                compression_name="myScalarQuantization",
             ),
             VectorSearchProfile(
                 name="myExhaustiveKnnProfile",
@@ -134,63 +167,158 @@ def create_index_definition(index_name: str, model: str) -> SearchIndex:
         vector_search=vector_search,
     )
 
+# maximum number of texts sent to the embeddings API in a single request
+EMBED_BATCH_SIZE = 16
+
+# maximum number of documents sent to the search index in a single upload
+UPLOAD_BATCH_SIZE = 1000
+
+# number of embedding requests kept in flight at once
+EMBED_MAX_WORKERS = 8
+
+# pages with less stripped text than this are not worth indexing
+MIN_TEXT_LENGTH = 32
+
+
+# embed a list of texts with one API call per batch of texts, instead of one
+# call per text; indexing is network bound, so collapsing round-trips is the
+# main lever on wall time
+def embed_batch(texts, model: str, batch_size=EMBED_BATCH_SIZE):
+    # identical texts (repeated boilerplate, shared headers) only need to be
+    # embedded once; fan the result back out to every original position
+    unique_texts = []
+    position_of = {}
+    idx_map = []
+    for text in texts:
+        key = hashlib.sha256(text.encode('utf-8')).digest()
+        if key not in position_of:
+            position_of[key] = len(unique_texts)
+            unique_texts.append(text)
+        idx_map.append(position_of[key])
+
+    vectors = cached_embed_batch(unique_texts, model, _embed_batch_uncached)
+    return [vectors[i] for i in idx_map]
+
+# the raw batched API calls, only reached for texts missing from the cache;
+# the API is I/O bound, so keep several batches in flight at once
+def _embed_batch_uncached(texts, model: str, batch_size=EMBED_BATCH_SIZE):
+    slices = [texts[start:start + batch_size] for start in range(0, len(texts), batch_size)]
+
+    vectors = []
+    with ThreadPoolExecutor(max_workers=EMBED_MAX_WORKERS) as executor:
+        # executor.map preserves slice order, so vectors line up with texts
+        for slice_vectors in executor.map(lambda s: _embed_slice(s, model), slices):
+            vectors.extend(slice_vectors)
+    return vectors
+
+# one embeddings request, retried with exponential backoff when throttled
+def _embed_slice(texts, model: str):
+    delay = 1
+    while True:
+        try:
+            emb = get_embeddings().embed(input=texts, model=model)
+            return [data.embedding for data in emb.data]
+        except HttpResponseError as e:
+            if e.status_code != 429 or delay > 32:
+                raise
+            logger.warning(f"Embeddings API throttled, retrying in {delay}s")
+            time.sleep(delay)
+            delay *= 2
+
+
 # define a function for indexing a csv file, that adds each row as a document
-# and generates vector embeddings for the specified content_column
-def create_docs_from_csv(path: str, content_column: str, model: str) -> list[dict[str, any]]:
-    products = pd.read_csv(path)
-    items = []
-    for product in products.to_dict("records"):
-        content = product[content_column]
-        id = str(product["id"])
-        title = product["name"]
-        url = f"/products/{title.lower().replace(' ', '-')}"
-        emb = embeddings.embed(input=content, model=model)
-        rec = {
-            "id": id,
-            "content": content,
-            "filepath": f"{title.lower().replace(' ', '-')}",
-            "title": title,
-            "url": url,
-            "contentVector": emb.data[0].embedding,
-        }
-        items.append(rec)
+# and generates vector embeddings for the specified content_column; the file
+# is read and yielded in bounded chunks so memory stays at one chunk of rows
+# instead of the whole file, and the caller can stream-upload
+def create_docs_from_csv(path: str, content_column: str, model: str):
+    for products in pd.read_csv(path, chunksize=256):
+        rows = products.to_dict("records")
+
+        # embed the chunk's rows with batched API calls, then zip the vectors back
+        vectors = embed_batch([row[content_column] for row in rows], model)
+
+        items = []
+        for product, vector in zip(rows, vectors):
+            content = product[content_column]
+            id = str(product["id"])
+            title = product["name"]
+            url = f"/products/{title.lower().replace(' ', '-')}"
+            rec = {
+                "id": id,
+                "content": content,
+                "filepath": f"{title.lower().replace(' ', '-')}",
+                "title": title,
+                "url": url,
+                "contentVector": vector,
+            }
+            items.append(rec)
+
+        yield items
 
-    return items
 
- 
 def extract_text_from_pdfs(pdf_dir, model: str):
-    text_data = []
-    files = os.listdir(pdf_dir)    
-    for file in files:
-        # Full path to the file
-        full_path = os.path.join(pdf_dir, file)        
-        text_data.extend (extract_text_from_pdf(full_path, model))
-    return text_data
-        
-def extract_text_from_pdf(pdf_path, model: str):
-    text_data = []
+    files = os.listdir(pdf_dir)
+    paths = [os.path.join(pdf_dir, file) for file in files]
+
+    # PyMuPDF text extraction is CPU bound, so extract the page texts of all
+    # files in a pool of worker processes; embedding stays in the main process.
+    # Yield the documents of one file at a time so the caller can stream-upload
+    # instead of holding every vector in memory
+    with multiprocessing.Pool(min(os.cpu_count() or 1, 4)) as pool:
+        for file_name, name, pdf_path, page_texts in pool.imap(extract_text_only, paths):
+            yield embed_pdf_pages(file_name, name, pdf_path, page_texts, model)
+
+# worker side of the pool: open the document and return plain page texts only,
+# so no Azure client has to be pickled across processes
+def extract_text_only(pdf_path):
     file_name = os.path.basename(pdf_path)
     logger.info(f"Processing file {file_name}")
     name = os.path.splitext(file_name)[0]
- 
-    pdf_document = fitz.Document(pdf_path)
-
-    for page_num in range(pdf_document.page_count):
-        page = pdf_document.load_page(page_num)
-        text = page.get_text()
-        id = get_file_hash (pdf_path)
-        emb = embeddings.embed(input=text, model=model)        
+
+    # iterate pages through the document's iterator protocol instead of
+    # load_page, which walks the page table on every call, and close the
+    # document deterministically; plain text extraction skips the layout
+    # analysis we don't need
+    page_texts = []
+    with fitz.open(pdf_path) as pdf_document:
+        for page in pdf_document:
+            page_texts.append(page.get_text("text", flags=fitz.TEXT_INHIBIT_SPACES | fitz.TEXT_PRESERVE_WHITESPACE))
+
+    return file_name, name, pdf_path, page_texts
+
+# embed the page texts with batched API calls and build the index documents
+def embed_pdf_pages(file_name, name, pdf_path, page_texts, model: str):
+    # hash the file once, not once per page, and suffix the page number so
+    # pages of the same file don't overwrite each other in the index
+    file_hash = get_file_hash (pdf_path)
+
+    pages = []
+    for page_num, text in enumerate(page_texts):
+        # skip blank cover/separator pages, they waste API calls and pollute
+        # the index with near-zero vectors
+        if len(text.strip()) < MIN_TEXT_LENGTH:
+            continue
+        pages.append((f"{file_hash}-{page_num}", text))
+
+    vectors = embed_batch([text for _, text in pages], model)
+
+    text_data = []
+    for (id, text), vector in zip(pages, vectors):
         text_data.append({
-            "id": id, 
-            "content": text, 
-            "filepath": file_name, 
-            "title": name, 
-            "url": pdf_path, 
-            "contentVector": emb.data[0].embedding,
+            "id": id,
+            "content": text,
+            "filepath": file_name,
+            "title": name,
+            "url": pdf_path,
+            "contentVector": vector,
         })
- 
+
     return text_data
 
+def extract_text_from_pdf(pdf_path, model: str):
+    file_name, name, pdf_path, page_texts = extract_text_only(pdf_path)
+    return embed_pdf_pages(file_name, name, pdf_path, page_texts, model)
+
 def extract_text_from_web_page(
     initial_url,
     model
@@ -207,47 +335,96 @@ def extract_text_from_web_page(
         List[Document]: List of documents.
 
     """
-    from urllib.parse import urlparse
+    import asyncio
 
-    import requests
-    from bs4 import BeautifulSoup
+    # crawl the site with concurrent fetches; a 200-500ms latency per page
+    # makes a sequential crawl minutes long on a large wiki
+    pages = asyncio.run(_crawl_web_pages(initial_url))
 
-    documents = []
-    urls = [initial_url]    
-    cookies = {'JSESSIONID': 'ED4CEED48F7F2272F4C8ABC530D5D011'}
+    # embed and yield the crawled pages in bounded batches, so the caller can
+    # stream-upload instead of holding every vector in memory
+    for start in range(0, len(pages), UPLOAD_BATCH_SIZE):
+        batch = pages[start:start + UPLOAD_BATCH_SIZE]
+        vectors = embed_batch([text for _, text, _, _ in batch], model)
 
-    while len(urls) != 0:
-        url = urls.pop()
-        print (f'Processing ...{url[-20:]}')
-        page = requests.get(url, cookies=cookies)
-        status_code = page.status_code
-        print (f'http status {status_code}')
-        if status_code == 200:
-            soup = BeautifulSoup(page.content, "html.parser")
-            title = soup.find('title')
-            text = soup.getText()
-
-            id = get_hash (text)
-            emb = embeddings.embed(input=text, model=model)        
+        documents = []
+        for (id, text, title, url), vector in zip(batch, vectors):
             documents.append({
-                "id": id, 
-                "content": text, 
-                "filepath": url, 
-                "title": title, 
-                "url": url, 
-                "contentVector": emb.data[0].embedding,
+                "id": id,
+                "content": text,
+                "filepath": url,
+                "title": title,
+                "url": url,
+                "contentVector": vector,
             })
 
-            link_elements = soup.select("a[href]")        
+        yield documents
 
-            for link_element in link_elements:
-                link_url = link_element['href']
-                if initial_url in link_url:
-                    urls.append (link_url)
-        else:
-            print ('skipping')
+async def _crawl_web_pages(initial_url):
+    import asyncio
+    from urllib.parse import urljoin
 
-    return documents       
+    import aiohttp
+
+    cookies = {'JSESSIONID': 'ED4CEED48F7F2272F4C8ABC530D5D011'}
+
+    pages = []
+    visited = {initial_url}
+
+    # keep at most 16 requests in flight
+    semaphore = asyncio.Semaphore(16)
+
+    async def fetch(session, url):
+        async with semaphore:
+            async with session.get(url) as response:
+                return url, response.status, await response.read()
+
+    async with aiohttp.ClientSession(cookies=cookies) as session:
+        pending = {asyncio.ensure_future(fetch(session, initial_url))}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                url, status, content = task.result()
+                print (f'Processing ...{url[-20:]}')
+                print (f'http status {status}')
+                if status != 200:
+                    print ('skipping')
+                    continue
+
+                # parse in a thread so BeautifulSoup doesn't block the loop
+                id, text, title, links = await asyncio.to_thread(_parse_page, content)
+
+                # skip pages that are only nav chrome, but still follow links
+                if len(text.strip()) >= MIN_TEXT_LENGTH:
+                    pages.append((id, text, title, url))
+
+                for link in links:
+                    link_url = urljoin(url, link)
+                    if initial_url in link_url and link_url not in visited:
+                        visited.add(link_url)
+                        pending.add(asyncio.ensure_future(fetch(session, link_url)))
+
+    return pages
+
+def _parse_page(content):
+    from bs4 import BeautifulSoup
+
+    # lxml is libxml2 under the hood, several times faster than the pure
+    # Python html.parser on large pages
+    soup = BeautifulSoup(content, "lxml")
+    title = soup.find('title')
+
+    # collect the links before dropping the navigation markup
+    links = [link_element['href'] for link_element in soup.select("a[href]")]
+
+    # drop script/style and chrome elements before extracting text, they only
+    # inflate the embedding input with useless tokens
+    for tag in soup(["script", "style", "nav", "footer", "noscript", "svg"]):
+        tag.decompose()
+    text = soup.get_text(separator=" ", strip=True)
+
+    id = get_hash (text)
+    return id, text, title, links
 
 def extract_text_from_db(
     host, user, password, database, model
@@ -290,17 +467,18 @@ def extract_text_from_db(
         url = f"https://home.intesys.it/wiki/-/wiki/{description.replace(' ', '+')}/{title.replace(' ', '+')}"
         print (f'Processing page {row_idx}/{row_count} - {title}')
 
+        # embed all chunks of the page with batched API calls before yielding
         chunks = split_content(text, format)
-        for i, chunk in enumerate(chunks):
+        vectors = embed_batch([chunk.page_content for chunk in chunks], model)
+        for i, (chunk, vector) in enumerate(zip(chunks, vectors)):
             id = get_hash((title, i, chunk.page_content))
-            emb = embeddings.embed(input=chunk.page_content, model=model)        
             documents.append({
-                "id": id, 
-                "content": chunk.page_content, 
-                "filepath": url, 
-                "title": title, 
-                "url": url, 
-                "contentVector": emb.data[0].embedding,
+                "id": id,
+                "content": chunk.page_content,
+                "filepath": url,
+                "title": title,
+                "url": url,
+                "contentVector": vector,
             })
 
         yield documents
@@ -311,114 +489,105 @@ def split_content(html_string, format):
         return split_creole (html_string)
     raise Exception (format)    
 
-def split_creole (creole):
-    html = creole2html (creole)    
+# the splitters are built once at module scope instead of once per page:
+# their constructors process the header list and compile separator regexes
+_HEADERS_TO_SPLIT_ON = [
+    ("h1", "Header 1"),
+    ("h2", "Header 2"),
+    ("h3", "Header 3"),
+    ("h4", "Header 4"),
+]
+_HTML_SPLITTER = HTMLHeaderTextSplitter(headers_to_split_on=_HEADERS_TO_SPLIT_ON)
+_TEXT_SPLITTER = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=30)
 
-    headers_to_split_on = [
-        ("h1", "Header 1"),
-        ("h2", "Header 2"),
-        ("h3", "Header 3"),
-        ("h4", "Header 4"),
-    ]
-
-    html_splitter = HTMLHeaderTextSplitter(headers_to_split_on=headers_to_split_on)
-
-    # for local file use html_splitter.split_text_from_file(<path_to_file>)
-    html_header_splits = html_splitter.split_text (html)
+def split_creole (creole):
+    html = creole2html (creole)
 
-    chunk_size = 500
-    chunk_overlap = 30
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=chunk_size, chunk_overlap=chunk_overlap
-    )
+    # for local file use _HTML_SPLITTER.split_text_from_file(<path_to_file>)
+    html_header_splits = _HTML_SPLITTER.split_text (html)
 
     # Split
-    return text_splitter.split_documents(html_header_splits)
+    return _TEXT_SPLITTER.split_documents(html_header_splits)
+
+# Create a buffered sender for the given index: it batches, retries and
+# pipelines the uploads internally, so the callers need no app-level
+# batching logic and uploads overlap the embedding of the next batch
+def create_buffered_sender(index_name):
+    search_connection = get_search_connection()
+    return SearchIndexingBufferedSender(
+        endpoint=search_connection.endpoint_url,
+        index_name=index_name,
+        credential=AzureKeyCredential(key=search_connection.key),
+    )
 
 def create_index_from_web_page(index_name, initial_url):
     # If a search index already exists, delete it:
     try:
-        index_definition = index_client.get_index(index_name)
-        index_client.delete_index(index_name)
+        index_definition = get_index_client().get_index(index_name)
+        get_index_client().delete_index(index_name)
         logger.info(f"🗑  Found existing index named '{index_name}', and deleted it")
     except Exception:
         pass
 
     # create an empty search index
     index_definition = create_index_definition(index_name, model=os.environ["EMBEDDINGS_MODEL"])
-    index_client.create_index(index_definition)
+    get_index_client().create_index(index_definition)
 
-    # create documents from the products.csv file, generating vector embeddings for the "description" column        
-    docs = extract_text_from_web_page(initial_url=initial_url, model=os.environ["EMBEDDINGS_MODEL"])
-
-    # Add the documents to the index using the Azure AI Search client
-    search_client = SearchClient(
-        endpoint=search_connection.endpoint_url,
-        index_name=index_name,
-        credential=AzureKeyCredential(key=search_connection.key),
-    )
-
-    search_client.upload_documents(docs)
-    logger.info(f"{len(docs)} documents uploaded to '{index_name}'")
+    # crawl the web page and stream the documents through the buffered sender
+    count = 0
+    with create_buffered_sender(index_name) as sender:
+        for docs in extract_text_from_web_page(initial_url=initial_url, model=os.environ["EMBEDDINGS_MODEL"]):
+            sender.upload_documents(docs)
+            count += len(docs)
+    logger.info(f"{count} documents uploaded to '{index_name}'")
 
 def create_index_from_db(index_name, host, user, password, database, delete_existing):
     # If a search index already exists, delete it:
     try:
-        index_definition = index_client.get_index(index_name)
+        index_definition = get_index_client().get_index(index_name)
         if delete_existing:
-            index_client.delete_index(index_name)
+            get_index_client().delete_index(index_name)
             logger.info(f"🗑  Found existing index named '{index_name}', and deleted it")
     except Exception:
         pass
 
     # create an empty search index
     index_definition = create_index_definition(index_name, model=os.environ["EMBEDDINGS_MODEL"])
-    index_client.create_index(index_definition)
+    get_index_client().create_index(index_definition)
 
-    # Add the documents to the index using the Azure AI Search client
-    search_client = SearchClient(
-        endpoint=search_connection.endpoint_url,
-        index_name=index_name,
-        credential=AzureKeyCredential(key=search_connection.key),
-    )
-
-    # create documents from the products.csv file, generating vector embeddings for the "description" column        
-    for docs in extract_text_from_db(host=host, user=user, password=password, database=database, model=os.environ["EMBEDDINGS_MODEL"]):
-        try:
-            if (len (docs) > 0):                
-                search_client.upload_documents(docs)
-                logger.info(f"{len(docs)} documents uploaded to '{index_name}'")
-            else:
-                logger.warning("Nothing to upload")    
-        except Exception as e:
-            logger.info(f'Upload failed: {e.args} ({type(e)})')
+    # create documents from the wiki pages, streaming them through the buffered sender
+    with create_buffered_sender(index_name) as sender:
+        for docs in extract_text_from_db(host=host, user=user, password=password, database=database, model=os.environ["EMBEDDINGS_MODEL"]):
+            try:
+                if (len (docs) > 0):
+                    sender.upload_documents(docs)
+                    logger.info(f"{len(docs)} documents queued for upload to '{index_name}'")
+                else:
+                    logger.warning("Nothing to upload")
+            except Exception as e:
+                logger.info(f'Upload failed: {e.args} ({type(e)})')
 
 
 def create_index_from_pdfs(index_name, pdf_dir):
     # If a search index already exists, delete it:
     try:
-        index_definition = index_client.get_index(index_name)
-        index_client.delete_index(index_name)
+        index_definition = get_index_client().get_index(index_name)
+        get_index_client().delete_index(index_name)
         logger.info(f"🗑  Found existing index named '{index_name}', and deleted it")
     except Exception:
         pass
 
     # create an empty search index
     index_definition = create_index_definition(index_name, model=os.environ["EMBEDDINGS_MODEL"])
-    index_client.create_index(index_definition)
-
-    # create documents from the products.csv file, generating vector embeddings for the "description" column
-    docs = extract_text_from_pdfs(pdf_dir=pdf_dir, model=os.environ["EMBEDDINGS_MODEL"])
-
-    # Add the documents to the index using the Azure AI Search client
-    search_client = SearchClient(
-        endpoint=search_connection.endpoint_url,
-        index_name=index_name,
-        credential=AzureKeyCredential(key=search_connection.key),
-    )
+    get_index_client().create_index(index_definition)
 
-    search_client.upload_documents(docs)
-    logger.info(f"Uploaded {len(docs)} documents to '{index_name}' index")
+    # extract the pdf documents and stream them through the buffered sender
+    count = 0
+    with create_buffered_sender(index_name) as sender:
+        for docs in extract_text_from_pdfs(pdf_dir=pdf_dir, model=os.environ["EMBEDDINGS_MODEL"]):
+            sender.upload_documents(docs)
+            count += len(docs)
+    logger.info(f"Uploaded {count} documents to '{index_name}' index")
 
 def get_hash(content, algorithm='sha256'):
     """
@@ -442,15 +611,13 @@ def get_hash(content, algorithm='sha256'):
     hash_func = hash_algorithms.get(algorithm.lower())
     if not hash_func:
         raise ValueError(f"Unsupported hash algorithm: {algorithm}")
-    
-    # Create hash object
-    hash_obj = hash_func()
-    
-    for element in content:
-        # Read and hash file in chunks to handle large files
-        hash_obj.update(str (element).encode(encoding = 'UTF-8', errors = 'strict'))
-    
-    return hash_obj.hexdigest()
+
+    # Hash one joined buffer instead of updating per element, so all the work
+    # happens in the C hashlib layer; the NUL separator keeps element
+    # boundaries from colliding
+    buf = b"\0".join(str (element).encode(encoding = 'UTF-8', errors = 'strict') for element in content)
+
+    return hash_func(buf).hexdigest()
 
 def get_file_hash(file_path, algorithm='sha256'):
     """
@@ -476,14 +643,17 @@ def get_file_hash(file_path, algorithm='sha256'):
         if not hash_func:
             raise ValueError(f"Unsupported hash algorithm: {algorithm}")
         
-        # Create hash object
-        hash_obj = hash_func()
-        
-        # Read and hash file in chunks to handle large files
+        # Read and hash file in chunks to handle large files; file_digest
+        # (Python 3.11+) hashes the whole file in a single C call, the
+        # fallback uses 1 MB reads so hashing is not syscall bound
         with open(file_path, 'rb') as file:
-            for chunk in iter(lambda: file.read(4096), b''):
-                hash_obj.update(chunk)
-        
+            if hasattr(hashlib, 'file_digest'):
+                hash_obj = hashlib.file_digest(file, algorithm.lower())
+            else:
+                hash_obj = hash_func()
+                for chunk in iter(lambda: file.read(1 << 20), b''):
+                    hash_obj.update(chunk)
+
         return hash_obj.hexdigest()
     
     except FileNotFoundError:
@@ -0,0 +1,29 @@
+import hashlib
+
+import diskcache
+
+# persistent on-disk cache of embedding vectors, so re-indexing runs only pay
+# the embeddings API for content that actually changed
+cache = diskcache.Cache(".emb_cache")
+
+
+# cache keys are namespaced by model, so switching EMBEDDINGS_MODEL does not
+# return vectors of the wrong dimension
+def cache_key(text, model: str):
+    return hashlib.sha256((model + "\0" + text).encode("utf-8")).digest()
+
+
+# look every text up in the cache and call embed_fn only for the misses,
+# storing the new vectors for the next run
+def cached_embed_batch(texts, model: str, embed_fn):
+    keys = [cache_key(text, model) for text in texts]
+    vectors = [cache.get(key) for key in keys]
+
+    miss_indexes = [i for i, vector in enumerate(vectors) if vector is None]
+    if miss_indexes:
+        miss_vectors = embed_fn([texts[i] for i in miss_indexes], model)
+        for i, vector in zip(miss_indexes, miss_vectors):
+            cache[keys[i]] = vector
+            vectors[i] = vector
+
+    return vectors
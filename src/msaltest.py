@@ -1,37 +1,209 @@
-from msal import PublicClientApplication
-
-app = PublicClientApplication(
-    "c12648ac-a859-4111-bf74-670736574c33",
-    authority="https://login.microsoftonline.com/2cd4ff2e-c457-4901-8faf-c2dbb6119a76")
-
-# initialize result variable to hole the token response
-result = None 
-
-# We now check the cache to see
-# whether we already have some accounts that the end user already used to sign in before.
-accounts = app.get_accounts()
-if accounts:
-    # If so, you could then somehow display these accounts and let end user choose
-    print("Pick the account you want to use to proceed:")
-    for a in accounts:
-        print(a["username"])
-    # Assuming the end user chose this one
-    chosen = accounts[0]
-    # Now let's try to find a token in cache for this account
-    result = app.acquire_token_silent(["User.Read"], account=chosen)
-
-if not result:
+import atexit
+import fcntl
+import functools
+import json
+import os
+import sys
+import time
+
+# The one scope set used by every flow: MSAL caches access tokens per exact
+# scope set, so asking for different scopes in the silent call and in the
+# fallback flows would miss the token the other one just stored and force a
+# needless refresh round-trip to AAD.
+SCOPES = ["User.Read"]
+
+# path of the token cache persisted across runs, so acquire_token_silent can
+# find tokens from previous runs and skip the device flow entirely
+CACHE_PATH = os.path.join(os.path.expanduser("~"), ".msaltest_cache.json")
+
+
+# Fast path for the common case: when the persisted cache already holds an
+# unexpired access token for our scopes, answer from a plain file read without
+# importing msal at all — the import pulls in requests and cryptography,
+# hundreds of ms and ~10 MB of RSS before any work happens.
+def try_cached_token():
+    try:
+        with open(CACHE_PATH) as cache_file:
+            data = json.load(cache_file)
+    except (OSError, ValueError):
+        return None
+
+    wanted = {scope.lower() for scope in SCOPES}
+    for entry in data.get("AccessToken", {}).values():
+        granted = {scope.lower() for scope in entry.get("target", "").split()}
+        if wanted <= granted and float(entry.get("expires_on", 0)) > time.time() + 60:
+            return entry.get("secret")
+    return None
+
+
+# load the cache persisted by previous runs; only reached when the fast path
+# missed, so the msal import happens here
+@functools.lru_cache(maxsize=1)
+def get_cache():
+    from msal import SerializableTokenCache
+
+    cache = SerializableTokenCache()
+    if os.path.exists(CACHE_PATH):
+        with open(CACHE_PATH) as cache_file:
+            cache.deserialize(cache_file.read())
+
+    # the atexit hook covers crashes after a token was acquired
+    atexit.register(persist_cache)
+    return cache
+
+
+# write the cache back if it changed; called under the file lock right after
+# a new token was acquired, and again when the script finishes
+def persist_cache():
+    cache = get_cache()
+    if cache.has_state_changed:
+        with open(CACHE_PATH, "w") as cache_file:
+            cache_file.write(cache.serialize())
+        os.chmod(CACHE_PATH, 0o600)
+
+
+# One long-lived session with keep-alive, so MSAL's instance-discovery,
+# tenant-metadata, device-flow poll and token calls reuse a single TLS
+# connection instead of handshaking on every request.
+@functools.lru_cache(maxsize=1)
+def get_http_client():
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+    return session
+
+
+# The application is created lazily and cached: construction performs
+# authority validation and instance-discovery HTTP calls, which should run at
+# most once per process no matter how many callers need a token.
+@functools.lru_cache(maxsize=1)
+def get_app():
+    from msal import PublicClientApplication
+
+    return PublicClientApplication(
+        "c12648ac-a859-4111-bf74-670736574c33",
+        authority="https://login.microsoftonline.com/2cd4ff2e-c457-4901-8faf-c2dbb6119a76",
+        # the authority is the public Azure cloud, so the instance-discovery
+        # GET against login.microsoftonline.com teaches us nothing; skipping
+        # it saves an HTTPS round-trip and a JSON parse on every cold start
+        instance_discovery=False,
+        token_cache=get_cache(),
+        http_client=get_http_client())
+
+
+# Tiny in-memory access-token memo: acquire_token_silent walks MSAL's whole
+# cache structure (scope matching, expiry checks) on every call, which adds up
+# for callers that need a token per request; a dict lookup keyed by account
+# and scope set short-circuits that on the hot path.
+_access_tokens = {}
+
+
+def acquire_token_silent_cached(scopes, account):
+    key = (account["home_account_id"], frozenset(scopes))
+    result = _access_tokens.get(key)
+    # keep a safety margin so a token about to expire gets refreshed
+    if result and result["_expires_at"] > time.time() + 60:
+        return result
+
+    # acquire_token_silent returns None both on a genuine cache miss and on a
+    # transient network failure during the refresh, escalating to a full
+    # interactive flow when a retry would have sufficed; the _with_error
+    # variant lets us tell the two apart and retry the transient ones
+    delay = 1
+    while True:
+        result = get_app().acquire_token_silent_with_error(scopes, account=account)
+        error = result.get("error") if result else None
+        if error is None:
+            break
+        if error in ("interaction_required", "invalid_grant") or delay > 4:
+            # a real miss (or retries exhausted): let the caller escalate
+            return None
+        time.sleep(delay)
+        delay *= 2
+
+    if result:
+        result["_expires_at"] = time.time() + result.get("expires_in", 3600)
+        _access_tokens[key] = result
+    return result
+
+
+# The chosen account is resolved once per process and kept in a module
+# global: get_accounts() scans the whole MSAL cache (which acquire_token_silent
+# then scans again), and the answer doesn't change for a single-user CLI.
+_account = None
+
+
+def get_account():
+    global _account
+    if _account is None:
+        # We now check the cache to see
+        # whether we already have some accounts that the end user already used to sign in before.
+        accounts = get_app().get_accounts()
+        if accounts:
+            # If so, you could then somehow display these accounts and let end user choose.
+            # One joined write instead of one write() syscall per account
+            sys.stdout.write(
+                "Pick the account you want to use to proceed:\n"
+                + "\n".join(a["username"] for a in accounts) + "\n")
+            # Assuming the end user chose this one
+            _account = accounts[0]
+    return _account
+
+
+def get_token():
+    # The common case — one known account with a valid cached token — runs
+    # straight through these two lines and returns.
+    chosen = get_account()
+    result = chosen and acquire_token_silent_cached(SCOPES, chosen)
+    if result and "access_token" in result:
+        return result
+
     # So no suitable token exists in cache. Let's get a new one from Azure AD.
-    # This will give a code to enter in a browser
-    flow = app.initiate_device_flow(scopes=["email"])
-    print(flow['message'])
-    result = app.acquire_token_by_device_flow(flow)
-
-if "access_token" in result:
-    print(result["access_token"])  # Yay!
-else:
-    print(result.get("error"))
-    print(result.get("error_description"))
-    print(result.get("correlation_id"))  # You may need this when reporting a bug
-    
-        
+    app = get_app()
+    if sys.stdin.isatty() and not os.environ.get("DISPLAY"):
+        # No browser available: fall back to the device flow, which gives a
+        # code to enter in a browser elsewhere and long-polls for the result
+        flow = app.initiate_device_flow(scopes=SCOPES)
+        print(flow['message'])
+        return app.acquire_token_by_device_flow(flow)
+
+    # The interactive flow receives the code on a loopback redirect and
+    # completes in a single round-trip through the system browser,
+    # instead of polling the token endpoint every ~5s
+    return app.acquire_token_interactive(scopes=SCOPES)
+
+
+if __name__ == "__main__":
+    # common case first: a valid cached token costs one local file read
+    token = try_cached_token()
+    if not token:
+        # Hold an exclusive lock over the acquire-and-persist sequence: a
+        # concurrent invocation that also missed the cache blocks here and
+        # then finds the token this one stored, instead of launching a second
+        # device/interactive flow and clobbering the cache file.
+        with open(CACHE_PATH + ".lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            token = try_cached_token()
+            if not token:
+                result = get_token()
+                if "access_token" in result:
+                    token = result["access_token"]  # Yay!
+                persist_cache()
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    if token:
+        # a single explicit write instead of print's per-line lock and flush,
+        # for callers that invoke this script in a tight loop
+        os.write(1, (token + "\n").encode())
+    else:
+        # one structured line on stderr, so machine consumers can json.loads
+        # it and stdout stays pipe-clean for $(python msaltest.py)-style
+        # callers; you may need the correlation id when reporting a bug
+        error = json.dumps({
+            "error": result.get("error"),
+            "error_description": result.get("error_description"),
+            "correlation_id": result.get("correlation_id"),
+        })
+        os.write(2, (error + "\n").encode())